@@ -21,17 +21,30 @@ A keyword filter also flags merger / special-situation stories.
 
 from __future__ import annotations
 
-import json
+import asyncio
+import functools
+import hashlib
 import logging
-from typing import Any
-
-import openai
-
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import hyperscan
+import orjson
+
+from app.feed_text import lede
+from app.openai_batch import run_batch
+from app.openai_client import get_client, new_async_client
 from app.tracing import get_tracer
 from app.config import (
+    EMBEDDING_MODEL,
     HEADLINE_CRITERIA,
+    LLM_BATCH_TOKEN_BUDGET,
     MACRO_HEADLINE_THRESHOLD,
-    OPENAI_API_KEY,
+    OPENAI_MAX_CONCURRENCY,
     OPENAI_MODEL,
     SEC_AI_TECH_MAX,
     SEC_GLOBAL_MAX,
@@ -39,14 +52,23 @@ from app.config import (
     SEC_MACRO_MAX,
     SEC_MERGER_MAX,
     SEC_WATCHLIST_MAX,
+    SEMANTIC_CACHE_PATH,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL_HOURS,
     SPECIAL_SITUATIONS_KEYWORDS,
+    USE_BATCH_API,
 )
 
+if TYPE_CHECKING:
+    import numpy as np
+    import openai
+    import tiktoken
+
+    from app.news_fetcher import Stories
+
 logger = logging.getLogger(__name__)
 tracer = get_tracer(__name__)
 
-client = openai.OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
-
 # Valid section keys (order matters for digest rendering)
 SECTIONS = [
     "headline",
@@ -66,11 +88,28 @@ SECTION_LIMITS: dict[str, int] = {
     "watchlist": SEC_WATCHLIST_MAX,
 }
 
+
+@dataclass(slots=True)
+class AnnotatedStory:
+    """A fetched story after classification, as placed in a section bucket."""
+
+    fingerprint: int
+    title: str
+    link: str
+    source: str
+    summary: str
+    section: str
+    triggered_by: list[str]
+    special_situations: list[str]
+    reason: str
+
+
 # ── LLM section classifier ─────────────────────────────────────────────────
 
 _SYSTEM_PROMPT = """\
 You are a senior news-desk editor building a morning brief.
-You will receive a JSON list of headlines (title, source, summary).
+You will receive a JSON list of headlines.  Each has a short "id",
+the title as "t" and the opening of the summary as "s".
 
 For EACH headline, decide:
   1. Whether it belongs in the brief (relevant = true/false).
@@ -95,90 +134,539 @@ Sections (use these exact keys):
                       Phrase reason as "Watch for...", "Risk to monitor...",
                       or "Potential second-order impact...".
 
-Return ONLY valid JSON (no markdown fences), a list of objects:
-[
-  {{
-    "id": <integer id from input>,
-    "relevant": true,
-    "section": "<section key>",
-    "reason": "<one sentence>"
-  }},
-  ...
-]
+Return a JSON object whose "results" list has one entry per headline:
+{{
+  "results": [
+    {{
+      "id": "<id from input>",
+      "relevant": true,
+      "rationed": false,
+      "section": "<section key>",
+      "reason": "<one sentence>"
+    }},
+    ...
+  ]
+}}
+
+Within this list, mark at most {caps} stories relevant.
+If more qualify, keep only the highest-priority ones relevant and mark
+the rest relevant = false with rationed = true.  Set rationed = false
+for every other headline.
+For relevant = false, set "reason" to an empty string.
 
 Be strict. No fluff. Crisp analytical filter.
-""".format(criteria="; ".join(HEADLINE_CRITERIA))
+""".format(
+    criteria="; ".join(HEADLINE_CRITERIA),
+    caps=", ".join(f"{n} {key}" for key, n in SECTION_LIMITS.items()),
+)
+
+# Appended only when the base prompt is too short for OpenAI's automatic
+# prompt caching.  Fixed text, so the prefix stays byte-identical.  It only
+# elaborates the section definitions and the output format above; it must
+# not add relevance rules, since it exists purely to reach the cache size.
+_SECTION_GUIDANCE = """
+Section guidance (apply when a story could fit more than one section):
+  - A story belongs in exactly one section.  Pick the section a reader
+    would look in first, not the one with the most keyword overlap.
+  - "headline" outranks every other section, but only when the story
+    clearly meets one of the criteria above.  A large but expected event
+    (a scheduled rate decision that matches consensus, an earnings beat,
+    a routine summit) is NOT a headline; place it in its topical section.
+  - Central bank, fiscal, trade-balance and commodity stories go to
+    "macro_markets" even when a government is the actor.  Sanctions,
+    tariffs and treaties go to "global_news" unless the story is mainly
+    about the market reaction.
+  - Regulation of AI or big tech goes to "ai_tech".  Antitrust action
+    that blocks or forces a break-up goes to "merger_news" when the
+    structural outcome is the story.
+  - Plain acquisitions, funding rounds and IPO filings are NOT
+    "merger_news" unless the structure itself is unusual (a demerger, a
+    spin-off of a listed division, a contested bid, an activist stake).
+  - "watchlist" is for developing situations whose consequence has not
+    landed yet: pending votes, deadlines, negotiations, early signals in
+    data.  Do not use it as an overflow bucket for other sections.
+
+Typical stories for each section:
+  "global_news"    -- a ceasefire agreed or broken; a treaty signed or
+                      withdrawn from; an election result that changes a
+                      government; a new sanctions package; a trade deal
+                      concluded between major economies.
+  "ai_tech"        -- a frontier model release; export controls on chips;
+                      a major platform changing its developer terms; a
+                      large data-centre or semiconductor investment; an
+                      AI regulation passed or struck down.
+  "macro_markets"  -- a central bank decision or guidance shift; a GDP,
+                      inflation or jobs print; a sharp move in bond
+                      yields, currencies, oil or gold; a sovereign rating
+                      change.
+  "merger_news"    -- a demerger or spin-off announced or completed; a
+                      carve-out IPO; an activist campaign for a break-up;
+                      a reverse split; a SPAC combination; a contested or
+                      hostile bid.
+  "watchlist"      -- a vote, ruling or deadline due in the coming days;
+                      negotiations that could still fail; an early data
+                      signal whose consequence is not yet visible.
+
+Reason guidance:
+  - One sentence, under 25 words, stating why the reader should care.
+  - Name the actor and the consequence.  Avoid adjectives such as
+    "significant", "major" or "notable" without a concrete fact.
+  - No em dashes.
+
+Output guidance:
+  - Return one object for every input id, including irrelevant ones,
+    so nothing is silently dropped.  Copy each id exactly as given.
+  - Keep "section" set to your best guess even when relevant = false.
+  - Use only the section keys listed above, spelled exactly as shown.
+"""
+
+# OpenAI caches prompt prefixes of at least this many tokens.
+_PROMPT_CACHE_MIN_TOKENS = 1024
+
+
+@functools.cache
+def _encoding() -> tiktoken.Encoding | None:
+    """Tokenizer for OPENAI_MODEL, or None if it cannot be loaded."""
+    try:
+        # Loading an encoding may download its BPE file (the image bakes it
+        # into TIKTOKEN_CACHE_DIR), so this stays off the import path.
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(OPENAI_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        logger.warning("tiktoken unavailable -- estimating tokens from length")
+        return None
+
+
+def _count_tokens(text: str) -> int:
+    """Token count for OPENAI_MODEL, or a ~4 chars/token estimate."""
+    enc = _encoding()
+    return len(enc.encode(text)) if enc else len(text) // 4
+
+
+@functools.cache
+def _system_prompt() -> tuple[str, int, str]:
+    """
+    Return (system prompt, its token count, prompt_cache_key).
+
+    Built on the first classification rather than at import, since
+    counting tokens loads the tokenizer.
+    """
+    prompt = _SYSTEM_PROMPT
+    tokens = _count_tokens(prompt)
+    if tokens < _PROMPT_CACHE_MIN_TOKENS:
+        prompt += _SECTION_GUIDANCE
+        tokens = _count_tokens(prompt)
+        if tokens < _PROMPT_CACHE_MIN_TOKENS:
+            logger.warning(
+                "Classifier system prompt is %d tokens; below the %d-token "
+                "prompt-cache threshold",
+                tokens,
+                _PROMPT_CACHE_MIN_TOKENS,
+            )
+    # Routes every batch to the same cache shard; changes only if the prompt does.
+    cache_key = "classify-" + hashlib.sha256(prompt.encode()).hexdigest()[:16]
+    return prompt, tokens, cache_key
+
+
+# Batches are packed up to LLM_BATCH_TOKEN_BUDGET prompt tokens.  The story
+# cap bounds completion length (~40 output tokens per story) on days when
+# summaries are short and many stories fit in the budget.
+_LLM_BATCH_MAX_STORIES = 100
+
+
+# Structured output: the API guarantees this shape, so responses are parsed
+# directly with no markdown-fence stripping.
+_CLASSIFY_SCHEMA: dict[str, Any] = {
+    "name": "section_classification",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string"},
+                        "relevant": {"type": "boolean"},
+                        "rationed": {"type": "boolean"},
+                        "section": {"type": "string", "enum": SECTIONS},
+                        "reason": {"type": "string"},
+                    },
+                    "required": ["id", "relevant", "rationed", "section", "reason"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["results"],
+        "additionalProperties": False,
+    },
+}
+
+# The classifier only needs the lede; the rest of the summary is prefill cost.
+_CLASSIFY_SUMMARY_WORDS = 40
 
 
-# Maximum stories per LLM batch.  Each story is ~500 tokens on average;
-# 50 stories ≈ 25 000 prompt tokens which stays well under typical TPM
-# limits even for free-tier orgs.
-_LLM_BATCH_SIZE = 50
+def _short_id(fingerprint: int) -> str:
+    """Compact per-story id sent to (and echoed back by) the LLM."""
+    return f"{fingerprint >> 32:08x}"
 
 
-def _llm_classify_batch(
-    stories: list[dict[str, Any]],
-    id_offset: int = 0,
-    span_parent: Any = None,
+def _payload_item(stories: Stories, row: int) -> dict[str, str]:
+    return {
+        "id": _short_id(stories.fingerprints[row]),
+        "t": stories.titles[row],
+        "s": lede(stories.summaries[row], _CLASSIFY_SUMMARY_WORDS),
+    }
+
+
+def _pack_batches(stories: Stories, rows: list[int]) -> list[list[int]]:
+    """Greedily pack story rows into batches that fit LLM_BATCH_TOKEN_BUDGET."""
+    budget = LLM_BATCH_TOKEN_BUDGET - _system_prompt()[1]
+    batches: list[list[int]] = []
+    current: list[int] = []
+    used = 0
+    for row in rows:
+        cost = _count_tokens(orjson.dumps(_payload_item(stories, row)).decode())
+        if current and (used + cost > budget or len(current) >= _LLM_BATCH_MAX_STORIES):
+            batches.append(current)
+            current, used = [], 0
+        current.append(row)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _classify_request(stories: Stories, rows: list[int]) -> dict[str, Any]:
+    """Build the chat-completion request body for one batch."""
+    payload = [_payload_item(stories, row) for row in rows]
+    system_prompt, _, cache_key = _system_prompt()
+    return {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": orjson.dumps(payload).decode()},
+        ],
+        "temperature": 0.2,
+        "response_format": {"type": "json_schema", "json_schema": _CLASSIFY_SCHEMA},
+        "prompt_cache_key": cache_key,
+    }
+
+
+def _parse_classify_response(
+    content: str | None,
+    usage: dict[str, int] | None,
+) -> tuple[list[dict], dict]:
+    """Parse one completion's content; return (results_list, usage_totals)."""
+    usage = usage or {}
+    totals = {
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+        "total_tokens": usage.get("total_tokens", 0),
+    }
+    return orjson.loads(content or "{}").get("results", []), totals
+
+
+async def _llm_classify_batch(
+    aclient: openai.AsyncOpenAI,
+    sem: asyncio.Semaphore,
+    stories: Stories,
+    rows: list[int],
 ) -> tuple[list[dict], dict]:
     """Classify a single batch; return (results_list, usage_totals)."""
-    payload = [
-        {
-            "id": id_offset + i,
-            "title": s["title"],
-            "source": s["source"],
-            "summary": s.get("summary", ""),
+    async with sem:
+        resp = await aclient.chat.completions.create(
+            **_classify_request(stories, rows)
+        )
+    usage = resp.usage.model_dump() if resp.usage else None
+    return _parse_classify_response(resp.choices[0].message.content, usage)
+
+
+async def _llm_classify_concurrent(
+    stories: Stories,
+    batches: list[list[int]],
+) -> list[tuple[list[dict], dict] | BaseException]:
+    """Classify every batch concurrently; failures are returned, not raised."""
+    sem = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+    # The async client is bound to this event loop, so it lives for one run.
+    async with new_async_client() as aclient:
+        return await asyncio.gather(
+            *(
+                _llm_classify_batch(aclient, sem, stories, batch)
+                for batch in batches
+            ),
+            return_exceptions=True,
+        )
+
+
+def _llm_classify_via_batch_api(
+    stories: Stories,
+    batches: list[list[int]],
+) -> list[tuple[list[dict], dict]]:
+    """Submit every batch as one Batch API job; return per-batch results."""
+    bodies = {
+        f"batch-{batch_idx}": _classify_request(stories, batch)
+        for batch_idx, batch in enumerate(batches)
+    }
+    responses = run_batch(get_client(), bodies)
+    out: list[tuple[list[dict], dict]] = []
+    for custom_id in bodies:
+        body = responses.get(custom_id)
+        if body is None:
+            logger.error("Batch API returned no result for %s", custom_id)
+            continue
+        try:
+            content = body["choices"][0]["message"]["content"]
+            out.append(_parse_classify_response(content, body.get("usage")))
+        except Exception:
+            logger.exception("Failed to parse Batch API result for %s", custom_id)
+    return out
+
+
+# ── Semantic classification cache ──────────────────────────────────────────
+
+
+class SemanticCache:
+    """
+    SQLite-backed cache of LLM verdicts keyed by story embedding.
+
+    Wire stories are re-syndicated across feeds and days with small wording
+    changes, so lookups match on cosine similarity rather than fingerprint.
+    Embeddings are stored as float16 to keep the file small.  Rows are
+    tagged with the embedding model; rows from any other model are dropped
+    on open, since their vectors are not comparable.
+    """
+
+    def __init__(
+        self, path: str, model: str, threshold: float, ttl_hours: int
+    ) -> None:
+        self._conn = sqlite3.connect(path)
+        self._model = model
+        self._threshold = threshold
+        try:
+            self._load(ttl_hours)
+        except BaseException:
+            self._conn.close()
+            raise
+
+    def _load(self, ttl_hours: int) -> None:
+        import numpy as np
+
+        columns = {
+            row[1]
+            for row in self._conn.execute("PRAGMA table_info(classifications)")
         }
-        for i, s in enumerate(stories)
+        if columns and "model" not in columns:
+            # Written before rows were tagged with their model; start over.
+            self._conn.execute("DROP TABLE classifications")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS classifications (
+                fingerprint TEXT PRIMARY KEY,
+                model       TEXT NOT NULL,
+                embedding   BLOB NOT NULL,
+                relevant    INTEGER NOT NULL,
+                section     TEXT NOT NULL,
+                reason      TEXT NOT NULL,
+                ts          REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "DELETE FROM classifications WHERE ts < ? OR model != ?",
+            (time.time() - ttl_hours * 3600, self._model),
+        )
+        self._conn.commit()
+
+        rows = self._conn.execute(
+            "SELECT embedding, relevant, section, reason FROM classifications"
+        ).fetchall()
+        self._infos = [
+            {"relevant": bool(relevant), "section": section, "reason": reason}
+            for _, relevant, section, reason in rows
+        ]
+        if rows:
+            matrix = np.stack(
+                [np.frombuffer(blob, dtype=np.float16) for blob, *_ in rows]
+            ).astype(np.float32)
+            self._matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+        else:
+            self._matrix = np.empty((0, 0), dtype=np.float32)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def lookup(self, vectors: np.ndarray) -> list[dict[str, Any] | None]:
+        """Return the cached verdict for each query vector, or None on a miss."""
+        import numpy as np
+
+        if not self._infos or self._matrix.shape[1] != vectors.shape[1]:
+            return [None] * len(vectors)
+        queries = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        sims = queries @ self._matrix.T
+        best = sims.argmax(axis=1)
+        return [
+            self._infos[j] if sims[i, j] >= self._threshold else None
+            for i, j in enumerate(best)
+        ]
+
+    def store(
+        self,
+        fingerprints: list[int],
+        vectors: np.ndarray,
+        infos: list[dict[str, Any]],
+    ) -> None:
+        import numpy as np
+
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO classifications "
+            "(fingerprint, model, embedding, relevant, section, reason, ts) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    f"{fp:016x}",
+                    self._model,
+                    vec.astype(np.float16).tobytes(),
+                    int(bool(info["relevant"])),
+                    info["section"],
+                    info["reason"],
+                    now,
+                )
+                for fp, vec, info in zip(fingerprints, vectors, infos)
+            ],
+        )
+        self._conn.commit()
+
+
+# The embeddings endpoint accepts at most 2048 inputs per request.
+_EMBED_BATCH_SIZE = 2048
+
+# Title plus a plain-text lede identifies a story for similarity purposes.
+# Full article bodies (Atom <content>, content:encoded) could exceed the
+# model's per-input token limit and fail the whole request.
+_EMBED_SUMMARY_WORDS = 80
+
+
+def _embed(stories: Stories, rows: list[int]) -> np.ndarray:
+    """Embed title + summary lede for each row; returns an (N, dim) matrix."""
+    import numpy as np
+
+    texts = [
+        f"{stories.titles[i]}\n{lede(stories.summaries[i], _EMBED_SUMMARY_WORDS)}"
+        for i in rows
     ]
-    resp = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[
-            {"role": "system", "content": _SYSTEM_PROMPT},
-            {"role": "user", "content": json.dumps(payload)},
-        ],
-        temperature=0.2,
-    )
-    usage = resp.usage
-    totals = {
-        "prompt_tokens": usage.prompt_tokens if usage else 0,
-        "completion_tokens": usage.completion_tokens if usage else 0,
-        "total_tokens": usage.total_tokens if usage else 0,
-    }
-    raw = resp.choices[0].message.content or "[]"
-    raw = (
-        raw.strip()
-        .removeprefix("```json")
-        .removeprefix("```")
-        .removesuffix("```")
-        .strip()
-    )
-    return json.loads(raw), totals
+    vectors: list[list[float]] = []
+    for i in range(0, len(texts), _EMBED_BATCH_SIZE):
+        resp = get_client().embeddings.create(
+            model=EMBEDDING_MODEL, input=texts[i : i + _EMBED_BATCH_SIZE]
+        )
+        vectors.extend(d.embedding for d in resp.data)
+    return np.asarray(vectors, dtype=np.float32)
 
 
 def _llm_classify(
-    stories: list[dict[str, Any]],
-) -> dict[str, dict[str, Any]]:
+    stories: Stories,
+    rows: list[int],
+) -> dict[int, dict[str, Any]]:
     """
-    Return {{fingerprint: {{"relevant": bool, "section": str, "reason": str}} }}
-
-    Stories are split into batches of _LLM_BATCH_SIZE to stay under
-    OpenAI token-per-minute limits.
+    Return {{row: {{"relevant": bool, "section": str, "reason": str}} }} for ``rows``
+
+    Stories that closely match a recently classified story (by embedding
+    similarity) reuse the cached verdict.  The rest are packed into batches
+    of up to LLM_BATCH_TOKEN_BUDGET prompt tokens to stay under OpenAI
+    token-per-minute limits.  Their verdicts are cached unless the story
+    was only rejected by the section caps ("rationed").
+    Batches run concurrently (up to OPENAI_MAX_CONCURRENCY in flight); with
+    USE_BATCH_API set they are submitted as a single Batch API job instead.
     """
-    if not client:
+    if not get_client():
         logger.warning("No OpenAI key -- skipping LLM classification")
         return {}
+    if not rows:
+        return {}
+
+    out: dict[int, dict[str, Any]] = {}
+    cache: SemanticCache | None = None
+    vectors: np.ndarray | None = None
+    pending = rows
 
+    if SEMANTIC_CACHE_PATH:
+        with tracer.start_as_current_span("semantic_cache") as span:
+            try:
+                cache = SemanticCache(
+                    SEMANTIC_CACHE_PATH,
+                    EMBEDDING_MODEL,
+                    SEMANTIC_CACHE_THRESHOLD,
+                    SEMANTIC_CACHE_TTL_HOURS,
+                )
+                all_vectors = _embed(stories, rows)
+                hits = cache.lookup(all_vectors)
+                miss_idx = [i for i, hit in enumerate(hits) if hit is None]
+                for row, hit in zip(rows, hits):
+                    if hit is not None:
+                        out[row] = hit
+                pending = [rows[i] for i in miss_idx]
+                vectors = all_vectors[miss_idx]
+                span.set_attribute("cache.hits", len(out))
+                span.set_attribute("cache.misses", len(pending))
+                logger.info(
+                    "Semantic cache: %d hit(s), %d miss(es)", len(out), len(pending)
+                )
+            except Exception:
+                logger.exception("Semantic cache unavailable -- classifying everything")
+                if cache is not None:
+                    cache.close()
+                cache = None
+                pending = rows
+
+    if not pending:
+        cache.close()
+        return out
+
+    try:
+        fresh = _llm_classify_uncached(stories, pending)
+        if cache is not None and fresh:
+            # A rationed rejection only says the story lost to others in
+            # the same batch; it is not a verdict worth reusing.
+            idx = [
+                i
+                for i, row in enumerate(pending)
+                if row in fresh and not fresh[row]["rationed"]
+            ]
+            try:
+                cache.store(
+                    [stories.fingerprints[pending[i]] for i in idx],
+                    vectors[idx],
+                    [fresh[pending[i]] for i in idx],
+                )
+            except Exception:
+                logger.exception("Failed to write semantic cache")
+    finally:
+        if cache is not None:
+            cache.close()
+
+    out.update(fresh)
+    return out
+
+
+def _llm_classify_uncached(
+    stories: Stories,
+    rows: list[int],
+) -> dict[int, dict[str, Any]]:
+    """Run the chat-completion classifier over the given story rows."""
     # Split into batches
-    batches = [
-        stories[i : i + _LLM_BATCH_SIZE]
-        for i in range(0, len(stories), _LLM_BATCH_SIZE)
-    ]
+    batches = _pack_batches(stories, rows)
     logger.info(
-        "Classifying %d stories in %d batch(es) of up to %d",
-        len(stories),
+        "Classifying %d stories in %d batch(es) of up to %d prompt tokens",
+        len(rows),
         len(batches),
-        _LLM_BATCH_SIZE,
+        LLM_BATCH_TOKEN_BUDGET,
     )
 
     all_results: list[dict] = []
@@ -186,13 +674,31 @@ def _llm_classify(
 
     with tracer.start_as_current_span("llm_classify") as span:
         span.set_attribute("llm.model", OPENAI_MODEL)
-        span.set_attribute("llm.stories_count", len(stories))
+        span.set_attribute("llm.stories_count", len(rows))
         span.set_attribute("llm.batches", len(batches))
+        span.set_attribute("llm.batch_api", USE_BATCH_API)
 
-        for batch_idx, batch in enumerate(batches):
+        if USE_BATCH_API:
             try:
-                id_offset = batch_idx * _LLM_BATCH_SIZE
-                results, usage = _llm_classify_batch(batch, id_offset, span)
+                for results, usage in _llm_classify_via_batch_api(stories, batches):
+                    all_results.extend(results)
+                    total_prompt += usage["prompt_tokens"]
+                    total_completion += usage["completion_tokens"]
+                    total_tokens += usage["total_tokens"]
+            except Exception:
+                logger.exception("Batch API classification failed")
+        else:
+            outcomes = asyncio.run(_llm_classify_concurrent(stories, batches))
+            for batch_idx, outcome in enumerate(outcomes):
+                if isinstance(outcome, BaseException):
+                    # Keep the remaining batches instead of failing entirely
+                    logger.error(
+                        "LLM classification failed on batch %d",
+                        batch_idx + 1,
+                        exc_info=outcome,
+                    )
+                    continue
+                results, usage = outcome
                 all_results.extend(results)
                 total_prompt += usage["prompt_tokens"]
                 total_completion += usage["completion_tokens"]
@@ -201,31 +707,26 @@ def _llm_classify(
                     "Batch %d/%d: classified %d stories (%d tokens)",
                     batch_idx + 1,
                     len(batches),
-                    len(batch),
+                    len(batches[batch_idx]),
                     usage["total_tokens"],
                 )
-            except Exception:
-                logger.exception("LLM classification failed on batch %d", batch_idx + 1)
-                # Continue with remaining batches instead of failing entirely
 
         span.set_attribute("llm.prompt_tokens", total_prompt)
         span.set_attribute("llm.completion_tokens", total_completion)
         span.set_attribute("llm.total_tokens", total_tokens)
 
-    id_to_fp = {i: s["fingerprint"] for i, s in enumerate(stories)}
-    out: dict[str, dict[str, Any]] = {}
+    short_to_row = {_short_id(stories.fingerprints[row]): row for row in rows}
+    out: dict[int, dict[str, Any]] = {}
     for r in all_results:
-        story_id = r.get("id")
-        if story_id is None:
-            continue
-        fp = id_to_fp.get(story_id)
-        if not fp:
+        row = short_to_row.get(str(r.get("id")))
+        if row is None:
             continue
         section = r.get("section", "global_news")
         if section not in SECTIONS:
             section = "global_news"
-        out[fp] = {
+        out[row] = {
             "relevant": r.get("relevant", False),
+            "rationed": r.get("rationed", False),
             "section": section,
             "reason": r.get("reason", ""),
         }
@@ -235,78 +736,137 @@ def _llm_classify(
 # ── Macro threshold trigger ────────────────────────────────────────────────
 
 
-def _macro_trigger(stories: list[dict[str, Any]]) -> set[str]:
-    """Return fingerprints that exceed the cross-feed threshold."""
+def _macro_trigger(stories: Stories) -> set[int]:
+    """Return rows whose feed count meets the cross-feed threshold."""
     return {
-        s["fingerprint"]
-        for s in stories
-        if s.get("feed_count", 1) >= MACRO_HEADLINE_THRESHOLD
+        row
+        for row, c in enumerate(stories.feed_counts)
+        if c >= MACRO_HEADLINE_THRESHOLD
     }
 
 
 # ── Keyword-based special-situations detector ──────────────────────────────
 
 
-def _detect_special_situations(story: dict[str, Any]) -> list[str]:
+# All keywords compile into one caseless Hyperscan database: each story is
+# scanned in place in a single pass, with no lowercased copy of the text.
+_KEYWORD_DB: hyperscan.Database | None = None
+if SPECIAL_SITUATIONS_KEYWORDS:
+    _KEYWORD_DB = hyperscan.Database()
+    _KEYWORD_DB.compile(
+        expressions=[re.escape(kw).encode() for kw in SPECIAL_SITUATIONS_KEYWORDS],
+        ids=list(range(len(SPECIAL_SITUATIONS_KEYWORDS))),
+        elements=len(SPECIAL_SITUATIONS_KEYWORDS),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH]
+        * len(SPECIAL_SITUATIONS_KEYWORDS),
+    )
+
+
+# A scratch space can serve only one scan at a time, and classify() runs in
+# worker threads that may overlap, so each thread gets its own.
+_scan_local = threading.local()
+
+
+def _keyword_scratch() -> hyperscan.Scratch:
+    scratch = getattr(_scan_local, "scratch", None)
+    if scratch is None:
+        scratch = _scan_local.scratch = hyperscan.Scratch(_KEYWORD_DB)
+    return scratch
+
+
+def _on_keyword_match(
+    kw_id: int, start: int, end: int, flags: int, hits: set[int]
+) -> None:
+    hits.add(kw_id)
+
+
+def _detect_special_situations(title: str, summary: str) -> list[str]:
     """Return matching special-situation keywords for a story."""
-    text = f"{story['title']} {story.get('summary', '')}".lower()
-    return [kw for kw in SPECIAL_SITUATIONS_KEYWORDS if kw.lower() in text]
+    if _KEYWORD_DB is None:
+        return []
+    hits: set[int] = set()
+    scratch = _keyword_scratch()
+    for text in (title, summary):
+        if text:
+            _KEYWORD_DB.scan(
+                text.encode(),
+                match_event_handler=_on_keyword_match,
+                context=hits,
+                scratch=scratch,
+            )
+    return [SPECIAL_SITUATIONS_KEYWORDS[idx] for idx in sorted(hits)]
 
 
 # ── Public API ──────────────────────────────────────────────────────────────
 
 
-def classify(
-    stories: list[dict[str, Any]],
-) -> dict[str, list[dict[str, Any]]]:
+def classify(stories: Stories) -> dict[str, list[AnnotatedStory]]:
     """
     Classify stories into sections.
 
-    Returns a dict keyed by section name, each value a list of annotated
-    story dicts.  Stories have extra fields:
-        section: str
-        triggered_by: list[str]
-        special_situations: list[str]
-        reason: str
+    ``stories`` is the table returned by ``fetch_all``; its ``feed_counts``
+    column drives the macro threshold trigger.
+
+    Returns a dict keyed by section name, each value a list of
+    ``AnnotatedStory`` (the fetched fields plus section, triggered_by,
+    special_situations and reason).  ``stories`` is not modified.
     """
     with tracer.start_as_current_span("classify") as span:
         span.set_attribute("classify.input_stories", len(stories))
 
-        llm_results = _llm_classify(stories)
-        macro_fps = _macro_trigger(stories)
+        macro_rows = _macro_trigger(stories)
+        categories = stories.feed_categories
 
-        buckets: dict[str, list[dict[str, Any]]] = {s: [] for s in SECTIONS}
+        # Macro hits are included regardless of the LLM; when the feed group
+        # already implies a section, skip spending tokens on them.
+        to_classify = [
+            row
+            for row in range(len(stories))
+            if not (row in macro_rows and categories[row])
+        ]
+        span.set_attribute("classify.macro_prefiltered", len(stories) - len(to_classify))
+        llm_results = _llm_classify(stories, to_classify)
 
-        for s in stories:
-            fp = s["fingerprint"]
+        buckets: dict[str, list[AnnotatedStory]] = {s: [] for s in SECTIONS}
+
+        # Single pass: LLM verdict, macro threshold, keyword override, caps
+        for row, title in enumerate(stories.titles):
             triggers: list[str] = []
 
-            llm_info = llm_results.get(fp, {})
+            llm_info = llm_results.get(row, {})
             if llm_info.get("relevant"):
                 triggers.append("llm")
-            if fp in macro_fps:
+            if row in macro_rows:
                 triggers.append("macro")
 
             if not triggers:
                 continue
 
-            # Determine section
-            section = llm_info.get("section", "global_news")
+            # Determine section (feed group default for prefiltered macro hits)
+            section = llm_info.get("section") or categories[row] or "global_news"
 
             # Keyword override: if special-situation keywords match, also
             # consider for merger_news
-            specials = _detect_special_situations(s)
+            summary = stories.summaries[row]
+            specials = _detect_special_situations(title, summary)
             if specials and section not in ("headline", "merger_news"):
                 section = "merger_news"
 
-            s["section"] = section
-            s["triggered_by"] = triggers
-            s["special_situations"] = specials
-            s["reason"] = llm_info.get("reason", "")
-
             # Respect per-section caps
             if len(buckets[section]) < SECTION_LIMITS.get(section, 5):
-                buckets[section].append(s)
+                buckets[section].append(
+                    AnnotatedStory(
+                        fingerprint=stories.fingerprints[row],
+                        title=title,
+                        link=stories.links[row],
+                        source=stories.sources[row],
+                        summary=summary,
+                        section=section,
+                        triggered_by=triggers,
+                        special_situations=specials,
+                        reason=llm_info.get("reason", ""),
+                    )
+                )
 
         # Log summary
         total = sum(len(v) for v in buckets.values())
@@ -12,6 +12,32 @@ load_dotenv()
 OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
 OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-5.2")
 
+# Route classification through the Batch API (half price, separate rate-limit
+# pool, minutes of latency).  Leave off for live / manual runs.
+USE_BATCH_API: bool = os.getenv("USE_BATCH_API", "false").lower() in ("1", "true", "yes")
+BATCH_POLL_SECONDS: int = int(os.getenv("BATCH_POLL_SECONDS", "30"))
+# The wait runs inside the /trigger request, so it must end before Cloud
+# Run's request timeout (300s by default) or the batch is never cancelled.
+# Raise it together with the service and scheduler timeouts (see README).
+BATCH_MAX_WAIT_SECONDS: int = int(os.getenv("BATCH_MAX_WAIT_SECONDS", "180"))
+
+# Maximum synchronous chat-completion requests in flight at once.
+OPENAI_MAX_CONCURRENCY: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+
+# Prompt-token budget per classification request (system prompt included).
+LLM_BATCH_TOKEN_BUDGET: int = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "20000"))
+
+# ── Semantic classification cache ──────────────────────────────────────────
+# Stories whose embedding is within SEMANTIC_CACHE_THRESHOLD cosine of a
+# recently classified story reuse that verdict instead of calling the LLM.
+# Set SEMANTIC_CACHE_PATH to an empty string to disable.
+SEMANTIC_CACHE_PATH: str = os.getenv(
+    "SEMANTIC_CACHE_PATH", "/tmp/morning_brief_cache.sqlite3"
+)
+SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.88"))
+SEMANTIC_CACHE_TTL_HOURS: int = int(os.getenv("SEMANTIC_CACHE_TTL_HOURS", "72"))
+EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+
 # ── Gmail SMTP ──────────────────────────────────────────────────────────────
 GMAIL_SENDER: str = os.getenv("GMAIL_SENDER", "")
 _GMAIL_RECIPIENT_RAW: str = os.getenv("GMAIL_RECIPIENT", "")
@@ -63,6 +89,32 @@ FEEDS_MERGER: list[str] = _parse_feeds("RSS_FEEDS_MERGER", _DEFAULT_MERGER_FEEDS
 # Flat list for the fetcher (backward compat)
 DEFAULT_FEEDS: list[str] = FEEDS_GLOBAL + FEEDS_AI_TECH + FEEDS_MACRO + FEEDS_MERGER
 
+# Default section for stories from each feed group.  Used when a story is
+# auto-included by the macro threshold without an LLM verdict.
+FEED_SECTIONS: dict[str, str] = {
+    **{u: "merger_news" for u in FEEDS_MERGER},
+    **{u: "macro_markets" for u in FEEDS_MACRO},
+    **{u: "ai_tech" for u in FEEDS_AI_TECH},
+    **{u: "global_news" for u in FEEDS_GLOBAL},
+}
+
+# ETag / Last-Modified cache so unchanged feeds come back as a 304 and are
+# not re-parsed.  Set FEED_CACHE_PATH to an empty string to disable.
+FEED_CACHE_PATH: str = os.getenv("FEED_CACHE_PATH", "/tmp/morning_brief_feeds.json")
+
+# Maximum feeds downloaded at once, so a long feed list does not open one
+# outbound connection per feed and exhaust Cloud Run's egress ports.
+FEED_MAX_CONCURRENCY: int = int(os.getenv("FEED_MAX_CONCURRENCY", "10"))
+
+# Reuse the previous fetch result for this many seconds, so bursts of
+# triggers (retries, manual runs) fetch once.  0 disables.
+FETCH_RESULT_TTL_SECONDS: int = int(os.getenv("FETCH_RESULT_TTL_SECONDS", "300"))
+
+# Parse RSS / Atom with a minimal lxml extractor instead of feedparser.
+# Much faster, but only understands plain RSS 2.0 and Atom; keep feedparser
+# (the default) for feeds in other dialects.
+USE_LXML_PARSER: bool = os.getenv("USE_LXML_PARSER", "false").lower() in ("1", "true", "yes")
+
 # ── Classifier thresholds ──────────────────────────────────────────────────
 # Macro-threshold trigger: minimum number of feeds that must carry a story
 # for it to be auto-included even without LLM confirmation.
@@ -22,28 +22,33 @@ Style rules
 
 from __future__ import annotations
 
-import json
+import hashlib
 import logging
 from datetime import datetime, timezone
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterator
 
-import openai
+import orjson
 
-from app.config import BRIEF_TITLE, OPENAI_API_KEY, OPENAI_MODEL, STORY_MAX_WORDS
+from app.config import BRIEF_TITLE, OPENAI_MODEL, STORY_MAX_WORDS
+from app.feed_text import lede, plain_text
+from app.openai_client import get_client
 from app.tracing import get_tracer
 
+if TYPE_CHECKING:
+    from app.classifier import AnnotatedStory
+
 logger = logging.getLogger(__name__)
 tracer = get_tracer(__name__)
 
-client = openai.OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
-
-# ── LLM summariser prompt ──────────────────────────────────────────────────
+# ── LLM writer prompt ──────────────────────────────────────────────────────
 
-_SUMMARY_SYSTEM = f"""
+_WRITER_SYSTEM = f"""
 You are writing a high-signal morning brief for an informed reader.
 The goal is clarity and consequence, not narration.
 
-Rules:
+You will receive a JSON list of stories, each tagged with its "section".
+
+For stories in every section EXCEPT "watchlist", write a "summary":
 - Open with the decisive fact or shift. No scene-setting.
 - Explain what changed, who is affected, and what follows.
 - Be analytical, not descriptive.
@@ -56,19 +61,7 @@ Rules:
 
 Each summary should feel sharp and purposeful, not flat.
 
-You will receive a JSON list of stories grouped by section.
-Return a JSON list of objects in this format:
-[
-  {{"title": "<exact original title>", "summary": "<your summary>"}}
-]
-
-Return ONLY valid JSON. No markdown fences.
-"""
-
-_WATCHLIST_SYSTEM = """\
-You are writing the Watchlist section of a morning brief.
-
-For each headline:
+For stories in the "watchlist" section, write a "bullet" instead:
 - Identify the next variable that could change the story.
 - Connect to why it matters for the reader (e.g. market impact, second-order effects).
 - Be concrete. Avoid vague macro language.
@@ -80,97 +73,101 @@ Each bullet must start with one of:
   "Watch for..."
   "Potential second-order impact..."
 
-Return:
-[{{"title": "...", "bullet": "..."}}]
-
-Return ONLY valid JSON. No markdown fences.
+Return one result per story with its exact original "title".
+Set the unused field ("bullet" for summaries, "summary" for bullets)
+to an empty string.
 """
 
+# STORY_MAX_WORDS is fixed at import, so the prompt is byte-identical
+# across runs and eligible for OpenAI prompt caching.
+_WRITER_CACHE_KEY = "write-" + hashlib.sha256(_WRITER_SYSTEM.encode()).hexdigest()[:16]
+
+# Every story comes back keyed by its title with both text fields present;
+# strict mode cannot express "one or the other", so the unused one is "".
+_WRITER_SCHEMA: dict[str, Any] = {
+    "name": "morning_brief_copy",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "title": {"type": "string"},
+                        "summary": {"type": "string"},
+                        "bullet": {"type": "string"},
+                    },
+                    "required": ["title", "summary", "bullet"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["results"],
+        "additionalProperties": False,
+    },
+}
 
-def _llm_summarize(stories: list[dict[str, Any]]) -> dict[str, str]:
-    """Return {{title: summary}} for non-watchlist stories."""
-    if not client or not stories:
-        return {}
-
-    payload = [
-        {"title": s["title"], "source": s["source"], "summary": s.get("summary", "")}
-        for s in stories
-    ]
 
-    with tracer.start_as_current_span("llm_summarize") as span:
-        span.set_attribute("llm.model", OPENAI_MODEL)
-        span.set_attribute("llm.stories_count", len(payload))
-        try:
-            resp = client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": _SUMMARY_SYSTEM},
-                    {"role": "user", "content": json.dumps(payload)},
-                ],
-                temperature=0.3,
-            )
-            usage = resp.usage
-            if usage:
-                span.set_attribute("llm.prompt_tokens", usage.prompt_tokens)
-                span.set_attribute("llm.completion_tokens", usage.completion_tokens)
-                span.set_attribute("llm.total_tokens", usage.total_tokens)
-            raw = resp.choices[0].message.content or "[]"
-            raw = (
-                raw.strip()
-                .removeprefix("```json")
-                .removeprefix("```")
-                .removesuffix("```")
-                .strip()
-            )
-            results = json.loads(raw)
-            return {r["title"]: r["summary"] for r in results if "title" in r}
-        except Exception:
-            span.set_attribute("llm.error", True)
-            logger.exception("LLM summarisation failed")
-            return {}
+# Source text beyond this is rarely needed to write a summary or bullet.
+_SOURCE_SUMMARY_WORDS = 120
 
 
-def _llm_watchlist(stories: list[dict[str, Any]]) -> dict[str, str]:
-    """Return {{title: bullet}} for watchlist stories."""
-    if not client or not stories:
-        return {}
+def _llm_write(
+    buckets: dict[str, list[AnnotatedStory]],
+) -> tuple[dict[str, str], dict[str, str]]:
+    """
+    Write summaries and watchlist bullets in a single LLM round-trip.
 
+    Returns ({{title: summary}}, {{title: bullet}}).
+    """
     payload = [
-        {"title": s["title"], "source": s["source"], "summary": s.get("summary", "")}
+        {
+            "section": key,
+            "title": s.title,
+            "source": s.source,
+            "summary": lede(s.summary, _SOURCE_SUMMARY_WORDS),
+        }
+        for key, stories in buckets.items()
         for s in stories
     ]
+    client = get_client()
+    if not client or not payload:
+        return {}, {}
 
-    with tracer.start_as_current_span("llm_watchlist") as span:
+    with tracer.start_as_current_span("llm_write") as span:
         span.set_attribute("llm.model", OPENAI_MODEL)
         span.set_attribute("llm.stories_count", len(payload))
         try:
             resp = client.chat.completions.create(
                 model=OPENAI_MODEL,
                 messages=[
-                    {"role": "system", "content": _WATCHLIST_SYSTEM},
-                    {"role": "user", "content": json.dumps(payload)},
+                    {"role": "system", "content": _WRITER_SYSTEM},
+                    {"role": "user", "content": orjson.dumps(payload).decode()},
                 ],
                 temperature=0.3,
+                response_format={"type": "json_schema", "json_schema": _WRITER_SCHEMA},
+                prompt_cache_key=_WRITER_CACHE_KEY,
             )
             usage = resp.usage
             if usage:
                 span.set_attribute("llm.prompt_tokens", usage.prompt_tokens)
                 span.set_attribute("llm.completion_tokens", usage.completion_tokens)
                 span.set_attribute("llm.total_tokens", usage.total_tokens)
-            raw = resp.choices[0].message.content or "[]"
-            raw = (
-                raw.strip()
-                .removeprefix("```json")
-                .removeprefix("```")
-                .removesuffix("```")
-                .strip()
-            )
-            results = json.loads(raw)
-            return {r["title"]: r["bullet"] for r in results if "title" in r}
+            results = orjson.loads(resp.choices[0].message.content or "{}")
+            summaries: dict[str, str] = {}
+            bullets: dict[str, str] = {}
+            for r in results.get("results", []):
+                if r.get("summary"):
+                    summaries[r["title"]] = r["summary"]
+                if r.get("bullet"):
+                    bullets[r["title"]] = r["bullet"]
+            return summaries, bullets
         except Exception:
             span.set_attribute("llm.error", True)
-            logger.exception("LLM watchlist generation failed")
-            return {}
+            logger.exception("LLM digest writing failed")
+            return {}, {}
 
 
 # ── HTML helpers ────────────────────────────────────────────────────────────
@@ -209,20 +206,21 @@ _SECTION_META: dict[str, dict[str, str]] = {
 }
 
 
-def _story_row(idx: int, story: dict[str, Any], summary: str) -> str:
-    title = story["title"]
-    link = story.get("link", "#")
-    source = story.get("source", "")
-    specials = story.get("special_situations", [])
-    special_tag = ""
-    if specials:
-        tags = ", ".join(specials)
-        special_tag = (
-            f'<span style="display:inline-block; margin-left:6px; '
-            f"font-size:11px; background:#fff3e0; color:#e65100; "
-            f'padding:1px 6px; border-radius:3px;">{tags}</span>'
-        )
-    return f"""
+# Feed and LLM text is untrusted: escape it once, in a single C-level pass.
+_HTML_ESCAPE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"}
+)
+
+
+# Templates are plain strings filled with format_map, so each row is one
+# C-level substitution rather than a fresh f-string build.
+_SPECIAL_TAG_TMPL = (
+    '<span style="display:inline-block; margin-left:6px; '
+    "font-size:11px; background:#fff3e0; color:#e65100; "
+    'padding:1px 6px; border-radius:3px;">{tags}</span>'
+)
+
+_STORY_ROW_TMPL = """
     <tr>
       <td style="padding:10px 14px; border-bottom:1px solid #eee;">
         <strong style="font-size:15px;">
@@ -238,38 +236,124 @@ def _story_row(idx: int, story: dict[str, Any], summary: str) -> str:
       </td>
     </tr>"""
 
+_WATCHLIST_BULLET_TMPL = (
+    '<li style="margin-bottom:6px; font-size:14px; color:#222;">'
+    '<a href="{link}" style="color:#1a73e8; text-decoration:none;">'
+    "{title}</a><br/>"
+    '<span style="color:#555;">{bullet}</span></li>'
+)
 
-def _watchlist_bullet(story: dict[str, Any], bullet: str) -> str:
-    link = story.get("link", "#")
-    return (
-        f'<li style="margin-bottom:6px; font-size:14px; color:#222;">'
-        f'<a href="{link}" style="color:#1a73e8; text-decoration:none;">'
-        f"{story['title']}</a><br/>"
-        f'<span style="color:#555;">{bullet}</span></li>'
-    )
-
-
-def _section_header(section_key: str) -> str:
-    meta = _SECTION_META[section_key]
-    return (
+# Headers depend only on static metadata, so render them once at import.
+_SECTION_HEADER_HTML: dict[str, str] = {
+    key: (
         f'<h3 style="color:{meta["color"]}; margin:28px 0 10px; '
         f'border-bottom:1px solid {meta["color"]}; padding-bottom:4px;">'
         f"{meta['icon']} {meta['label']}</h3>"
     )
+    for key, meta in _SECTION_META.items()
+}
+
+
+def _story_row(idx: int, story: AnnotatedStory, summary: str) -> str:
+    specials = story.special_situations
+    special_tag = (
+        _SPECIAL_TAG_TMPL.format_map(
+            {"tags": ", ".join(specials).translate(_HTML_ESCAPE)}
+        )
+        if specials
+        else ""
+    )
+    return _STORY_ROW_TMPL.format_map(
+        {
+            "idx": idx,
+            "link": (story.link or "#").translate(_HTML_ESCAPE),
+            "title": story.title.translate(_HTML_ESCAPE),
+            "special_tag": special_tag,
+            "source": story.source.translate(_HTML_ESCAPE),
+            "summary": summary.translate(_HTML_ESCAPE),
+        }
+    )
+
+
+def _watchlist_bullet(story: AnnotatedStory, bullet: str) -> str:
+    return _WATCHLIST_BULLET_TMPL.format_map(
+        {
+            "link": (story.link or "#").translate(_HTML_ESCAPE),
+            "title": story.title.translate(_HTML_ESCAPE),
+            "bullet": bullet.translate(_HTML_ESCAPE),
+        }
+    )
+
+
+_RENDER_ORDER = [
+    "headline",
+    "global_news",
+    "ai_tech",
+    "macro_markets",
+    "merger_news",
+    "watchlist",
+]
+
+_DIGEST_HEAD_TMPL = """\
+<html>
+<body style="font-family: 'Helvetica Neue', Arial, sans-serif; max-width:700px; margin:auto; padding:24px; background:#fafafa;">
+  <div style="background:#fff; border-radius:8px; padding:24px; border:1px solid #e0e0e0;">
+    <h2 style="margin:0 0 4px; color:#111;">{title}</h2>
+    <p style="color:#888; font-size:13px; margin:0 0 20px;">{today} // {total_stories} stories</p>
+    """
+
+_DIGEST_FOOT = """
+    <p style="font-size:11px; color:#bbb; margin-top:36px; text-align:center;">
+      Generated automatically // RSS + LLM pipeline // 9:30 AM daily
+    </p>
+  </div>
+</body>
+</html>"""
+
+
+def _iter_sections(
+    buckets: dict[str, list[AnnotatedStory]],
+    summaries: dict[str, str],
+    watchlist_bullets: dict[str, str],
+) -> Iterator[str]:
+    """Yield the digest body HTML section by section, in render order."""
+    story_counter = 0
+    for sec in _RENDER_ORDER:
+        stories = buckets.get(sec, [])
+        if not stories:
+            continue  # suppress empty sections (especially headline)
+
+        yield _SECTION_HEADER_HTML[sec]
+
+        if sec == "watchlist":
+            yield '<ul style="padding-left:20px;">'
+            for s in stories:
+                bullet = watchlist_bullets.get(s.title, s.reason)
+                yield _watchlist_bullet(s, bullet)
+            yield "</ul>"
+        else:
+            yield '<table style="width:100%; border-collapse:collapse;">'
+            for s in stories:
+                story_counter += 1
+                summary = summaries.get(s.title)
+                if summary is None:
+                    summary = plain_text(s.summary)
+                yield _story_row(story_counter, s, summary)
+            yield "</table>"
 
 
 # ── Public API ──────────────────────────────────────────────────────────────
 
 
 def build_digest(
-    buckets: dict[str, list[dict[str, Any]]],
+    buckets: dict[str, list[AnnotatedStory]],
 ) -> tuple[str, str]:
     """
     Build the HTML digest email from section buckets.
 
     Parameters
     ----------
-    buckets : dict mapping section key to list of story dicts.
+    buckets : dict mapping section key to list of AnnotatedStory.
 
     Returns
     -------
@@ -279,73 +363,22 @@ def build_digest(
         today = datetime.now(timezone.utc).strftime("%A, %B %d, %Y")
         subject = f"{BRIEF_TITLE} // {today}"
 
-        # Collect all non-watchlist stories for a single summarise call
-        non_wl_stories = [
-            s
-            for key in (
-                "headline",
-                "global_news",
-                "ai_tech",
-                "macro_markets",
-                "merger_news",
-            )
-            for s in buckets.get(key, [])
-        ]
-        summaries = _llm_summarize(non_wl_stories)
-        watchlist_bullets = _llm_watchlist(buckets.get("watchlist", []))
+        # Summaries and watchlist bullets come back from one LLM call
+        summaries, watchlist_bullets = _llm_write(buckets)
 
         total_stories = sum(len(v) for v in buckets.values())
         span.set_attribute("digest.total_stories", total_stories)
 
-        # ── Assemble HTML ───────────────────────────────────────────────
-        sections_html = ""
-        story_counter = 0
-
-        render_order = [
-            "headline",
-            "global_news",
-            "ai_tech",
-            "macro_markets",
-            "merger_news",
-            "watchlist",
-        ]
-
-        for sec in render_order:
-            stories = buckets.get(sec, [])
-            if not stories:
-                continue  # suppress empty sections (especially headline)
-
-            sections_html += _section_header(sec)
-
-            if sec == "watchlist":
-                bullets_html = ""
-                for s in stories:
-                    bullet = watchlist_bullets.get(s["title"], s.get("reason", ""))
-                    bullets_html += _watchlist_bullet(s, bullet)
-                sections_html += f'<ul style="padding-left:20px;">{bullets_html}</ul>'
-            else:
-                rows_html = ""
-                for s in stories:
-                    story_counter += 1
-                    summary = summaries.get(s["title"], s.get("summary", ""))
-                    rows_html += _story_row(story_counter, s, summary)
-                sections_html += (
-                    f'<table style="width:100%; border-collapse:collapse;">'
-                    f"{rows_html}</table>"
-                )
-
-        html = f"""\
-<html>
-<body style="font-family: 'Helvetica Neue', Arial, sans-serif; max-width:700px; margin:auto; padding:24px; background:#fafafa;">
-  <div style="background:#fff; border-radius:8px; padding:24px; border:1px solid #e0e0e0;">
-    <h2 style="margin:0 0 4px; color:#111;">{BRIEF_TITLE}</h2>
-    <p style="color:#888; font-size:13px; margin:0 0 20px;">{today} // {total_stories} stories</p>
-    {sections_html}
-    <p style="font-size:11px; color:#bbb; margin-top:36px; text-align:center;">
-      Generated automatically // RSS + LLM pipeline // 9:30 AM daily
-    </p>
-  </div>
-</body>
-</html>"""
+        # Head, section chunks and footer are joined in a single copy
+        head = _DIGEST_HEAD_TMPL.format(
+            title=BRIEF_TITLE, today=today, total_stories=total_stories
+        )
+        html = "".join(
+            (
+                head,
+                *_iter_sections(buckets, summaries, watchlist_bullets),
+                _DIGEST_FOOT,
+            )
+        )
 
         return subject, html
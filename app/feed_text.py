@@ -0,0 +1,32 @@
+"""
+Plain-text helpers for feed summaries.
+
+Summaries are kept as the feed's raw, unsanitised HTML (see news_fetcher).
+Anything that counts words in them, sends them to a model or shows them
+verbatim converts them here first, so markup and attributes do not eat
+word budgets or end up in the email.
+"""
+
+from __future__ import annotations
+
+import re
+from html import unescape
+
+_SCRIPT_STYLE_RE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.I | re.S)
+_TAG_RE = re.compile(r"<[^>]*>")
+
+
+def _words(markup: str) -> list[str]:
+    if "<" in markup:
+        markup = _TAG_RE.sub(" ", _SCRIPT_STYLE_RE.sub(" ", markup))
+    return unescape(markup).split()
+
+
+def plain_text(markup: str) -> str:
+    """Plain text of a feed summary: tags dropped, entities decoded."""
+    return " ".join(_words(markup))
+
+
+def lede(markup: str, max_words: int) -> str:
+    """The first ``max_words`` words of a feed summary, as plain text."""
+    return " ".join(_words(markup)[:max_words])
@@ -1,15 +1,22 @@
 """Gmail sender — sends the digest email via SMTP using a Google App Password.
 
 Requires only two env-vars: GMAIL_SENDER and GMAIL_APP_PASSWORD.
-No OAuth consent screen, no token refresh, no extra dependencies.
+No OAuth consent screen, no token refresh.  The SMTP exchange runs on the
+event loop (aiosmtplib), so /trigger does not tie up a worker thread while
+Gmail responds.
 """
 
 from __future__ import annotations
 
+import asyncio
+import base64
 import logging
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+import ssl
+import uuid
+from email.header import Header
+from email.utils import formatdate, make_msgid
+
+import aiosmtplib
 
 from app.config import GMAIL_APP_PASSWORD, GMAIL_RECIPIENTS, GMAIL_SENDER
 from app.tracing import get_tracer
@@ -20,8 +27,61 @@ tracer = get_tracer(__name__)
 SMTP_HOST = "smtp.gmail.com"
 SMTP_PORT = 465
 
+# Loading the system CA bundle is the slow part of TLS setup; do it once per
+# process so warm containers reuse it on every send.
+_SSL_CONTEXT = ssl.create_default_context()
+
+_PLAIN_FALLBACK = b"Please view this email in an HTML-capable client."
+
+
+def _encode_header(value: str) -> str:
+    """RFC 2047-encode a header value only when it is not plain ASCII."""
+    if value.isascii():
+        return value
+    # Long values are folded; SMTP needs CRLF there too, not a bare LF
+    return Header(value, "utf-8").encode(linesep="\r\n")
 
-def send_email(subject: str, html_body: str) -> None:
+
+def _build_message(subject: str, html_body: str) -> tuple[bytes, str]:
+    """
+    Assemble a multipart/alternative RFC 822 message directly as bytes.
+
+    Skips the ``email.mime`` object graph and its re-serialisation: the HTML
+    is encoded once and base64-wrapped once.  Returns (raw_message, message_id).
+    """
+    boundary = f"=_{uuid.uuid4().hex}"
+    message_id = make_msgid(domain=GMAIL_SENDER.rpartition("@")[2] or "localhost")
+    headers = (
+        f"From: {GMAIL_SENDER}\r\n"
+        f"To: {', '.join(GMAIL_RECIPIENTS)}\r\n"
+        f"Subject: {_encode_header(subject)}\r\n"
+        f"Date: {formatdate(usegmt=True)}\r\n"
+        f"Message-ID: {message_id}\r\n"
+        "MIME-Version: 1.0\r\n"
+        f'Content-Type: multipart/alternative; boundary="{boundary}"\r\n'
+        "\r\n"
+    ).encode()
+    # encodebytes wraps at 76 chars; SMTP requires CRLF line endings
+    html_b64 = base64.encodebytes(html_body.encode()).replace(b"\n", b"\r\n")
+    delim = f"--{boundary}\r\n".encode()
+    raw = b"".join(
+        (
+            headers,
+            delim,
+            b"Content-Type: text/plain; charset=us-ascii\r\n\r\n",
+            _PLAIN_FALLBACK,
+            b"\r\n",
+            delim,
+            b"Content-Type: text/html; charset=utf-8\r\n",
+            b"Content-Transfer-Encoding: base64\r\n\r\n",
+            html_b64,
+            f"--{boundary}--\r\n".encode(),
+        )
+    )
+    return raw, message_id
+
+
+async def send_email_async(subject: str, html_body: str) -> dict[str, str]:
     """
     Send an HTML email through Gmail SMTP.
 
@@ -31,25 +91,34 @@ def send_email(subject: str, html_body: str) -> None:
         Email subject line.
     html_body : str
         Full HTML content of the email.
+
+    Returns
+    -------
+    {"id": <Message-ID header of the sent email>}
     """
     with tracer.start_as_current_span("send_email") as span:
         span.set_attribute("email.recipients", ", ".join(GMAIL_RECIPIENTS))
         span.set_attribute("email.subject", subject)
 
-        message = MIMEMultipart("alternative")
-        message["From"] = GMAIL_SENDER
-        message["To"] = ", ".join(GMAIL_RECIPIENTS)
-        message["Subject"] = subject
+        raw, message_id = _build_message(subject, html_body)
 
-        # Plain-text fallback
-        message.attach(
-            MIMEText("Please view this email in an HTML-capable client.", "plain")
+        await aiosmtplib.send(
+            raw,
+            sender=GMAIL_SENDER,
+            recipients=GMAIL_RECIPIENTS,
+            hostname=SMTP_HOST,
+            port=SMTP_PORT,
+            username=GMAIL_SENDER,
+            password=GMAIL_APP_PASSWORD,
+            use_tls=True,
+            tls_context=_SSL_CONTEXT,
         )
-        message.attach(MIMEText(html_body, "html"))
-
-        with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT) as server:
-            server.login(GMAIL_SENDER, GMAIL_APP_PASSWORD)
-            server.sendmail(GMAIL_SENDER, GMAIL_RECIPIENTS, message.as_string())
 
         logger.info("Email sent via SMTP to %s", GMAIL_RECIPIENTS)
         span.set_attribute("email.status", "sent")
+        return {"id": message_id}
+
+
+def send_email(subject: str, html_body: str) -> dict[str, str]:
+    """Blocking wrapper around ``send_email_async`` for synchronous callers."""
+    return asyncio.run(send_email_async(subject, html_body))
@@ -1,103 +1,508 @@
 """
 RSS / Atom feed aggregator.
 
-Fetches headlines from every configured feed, deduplicates by title
-similarity, and returns a flat list of story dicts.
+Fetches headlines from every configured feed concurrently, deduplicates
+by title similarity, and returns the stories as a column-oriented
+``Stories`` table that also records how many feeds carried each story.
 """
 
 from __future__ import annotations
 
-import hashlib
+import array
+import asyncio
+import calendar
 import logging
+import os
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from typing import Any
 
-import feedparser
+import aiohttp
+import orjson
+import xxhash
+from cachetools import TTLCache
 
-from app.config import DEFAULT_FEEDS
+from app.config import (
+    DEFAULT_FEEDS,
+    FEED_CACHE_PATH,
+    FEED_MAX_CONCURRENCY,
+    FEED_SECTIONS,
+    FETCH_RESULT_TTL_SECONDS,
+    USE_LXML_PARSER,
+)
 from app.tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 tracer = get_tracer(__name__)
 
 
-def _fingerprint(title: str) -> str:
-    """Lowercase, stripped MD5 — used for cheap dedup."""
-    return hashlib.md5(title.strip().lower().encode()).hexdigest()
+@dataclass(slots=True)
+class Stories:
+    """
+    Deduplicated stories stored column-wise: row ``i`` of every list is one
+    story.  Keeps per-story overhead to a few list slots instead of a dict.
+    """
+
+    titles: list[str] = field(default_factory=list)
+    links: list[str] = field(default_factory=list)
+    sources: list[str] = field(default_factory=list)
+    published: list[str] = field(default_factory=list)
+    summaries: list[str] = field(default_factory=list)
+    fingerprints: list[int] = field(default_factory=list)
+    # Default section of the first feed carrying the story, or None
+    feed_categories: list[str | None] = field(default_factory=list)
+    # Number of feeds carrying the story
+    feed_counts: array.array = field(default_factory=lambda: array.array("i"))
+    _rows: dict[int, int] = field(default_factory=dict, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def add(
+        self,
+        fingerprint: int,
+        title: str,
+        link: str,
+        source: str,
+        published: str,
+        summary: str,
+        feed_category: str | None,
+    ) -> bool:
+        """Append a story, or count another feed for a known one (False)."""
+        row = self._rows.get(fingerprint)
+        if row is not None:
+            self.feed_counts[row] += 1
+            return False
+        self._rows[fingerprint] = len(self.titles)
+        self.titles.append(title)
+        self.links.append(link)
+        self.sources.append(source)
+        self.published.append(published)
+        self.summaries.append(summary)
+        self.fingerprints.append(fingerprint)
+        self.feed_categories.append(feed_category)
+        self.feed_counts.append(1)
+        return True
 
 
-def _is_recent(entry: Any, cutoff: datetime) -> bool:
-    """Return True if the entry was published/updated within the cutoff window."""
-    import calendar
-    import time
+def _fingerprint(title: str) -> int:
+    """Casefolded, stripped 64-bit xxh3 — used for cheap dedup."""
+    return xxhash.xxh3_64_intdigest(title.strip().casefold().encode())
 
+
+def _entry_timestamp(entry: Any) -> int | None:
+    """Epoch seconds of the entry's published/updated date, if parseable."""
     for key in ("published_parsed", "updated_parsed"):
         tp = entry.get(key)
         if tp:
             try:
-                entry_dt = datetime.fromtimestamp(calendar.timegm(tp), tz=timezone.utc)
-                return entry_dt >= cutoff
-            except (ValueError, OverflowError, OSError):
+                return calendar.timegm(tp)
+            except (TypeError, ValueError, OverflowError):
                 continue
-    # If no parseable date is available, exclude the entry
-    return False
+    return None
 
 
-def fetch_all(feeds: list[str] | None = None) -> list[dict[str, Any]]:
+def _recent_entries(parsed: Any, cutoff_ts: int) -> list[dict[str, Any]]:
     """
-    Fetch and merge entries from all RSS feeds.
+    Reduce a parsed feed to the plain fields the pipeline uses.
 
-    Returns a list of dicts, each containing:
-        title, link, source, published, fingerprint
+    Entries without a parseable date or older than cutoff_ts are excluded.
+    The result is JSON-serialisable so it can be reused on a 304.
+    """
+    entries: list[dict[str, Any]] = []
+    for entry in parsed.entries:
+        ts = _entry_timestamp(entry)
+        if ts is None or ts < cutoff_ts:
+            continue
+        title = entry.get("title", "").strip()
+        if not title:
+            continue
+        entries.append(
+            {
+                "title": title,
+                "link": entry.get("link", ""),
+                "published": entry.get("published", entry.get("updated", "")),
+                "summary": entry.get("summary", ""),
+                "ts": ts,
+            }
+        )
+    return entries
+
+
+def _load_feed_cache() -> dict[str, dict[str, Any]]:
+    if not FEED_CACHE_PATH:
+        return {}
+    try:
+        with open(FEED_CACHE_PATH, "rb") as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return {}
+    except Exception:
+        logger.exception("Ignoring unreadable feed cache %s", FEED_CACHE_PATH)
+        return {}
+
+
+def _save_feed_cache(cache: dict[str, dict[str, Any]]) -> None:
+    if not FEED_CACHE_PATH:
+        return
+    tmp_path = f"{FEED_CACHE_PATH}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(cache))
+        os.replace(tmp_path, FEED_CACHE_PATH)
+    except Exception:
+        logger.exception("Failed to write feed cache %s", FEED_CACHE_PATH)
+
+
+# Sent on every feed request.  A constant so opening the session at
+# startup does not pull in feedparser.
+_USER_AGENT = "morning-brief/1.0 (RSS digest)"
+
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_DC_DATE = "{http://purl.org/dc/elements/1.1/}date"
+_CONTENT_ENCODED = "{http://purl.org/rss/1.0/modules/content/}encoded"
+_XHTML = "{http://www.w3.org/1999/xhtml}"
+
+
+def _parse_date(value: str | None) -> int | None:
+    """Epoch seconds of an RFC 822 (RSS) or ISO 8601 (Atom) date string."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            dt = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _atom_link(entry: Any) -> str:
+    """href of the entry's alternate link (Atom allows several)."""
+    for link in entry.findall(f"{_ATOM}link"):
+        if link.get("rel", "alternate") == "alternate" and link.get("href"):
+            return link.get("href")
+    return ""
+
+
+def _rss_link(item: Any) -> str:
+    """<link>, else a permalink <guid> (isPermaLink defaults to true)."""
+    link = (item.findtext("link") or "").strip()
+    if link:
+        return link
+    guid = item.find("guid")
+    if guid is None or guid.get("isPermaLink", "true").strip().lower() == "false":
+        return ""
+    return (guid.text or "").strip()
+
+
+def _atom_text(entry: Any, tag: str) -> str | None:
+    """
+    Markup of an Atom text construct.  type="xhtml" content lives in a
+    wrapper <div>; return its inner XHTML without the namespace, as
+    feedparser does, instead of the (empty) text of the element itself.
+    """
+    from lxml import etree
+
+    el = entry.find(f"{_ATOM}{tag}")
+    if el is None:
+        return None
+    if el.get("type") != "xhtml":
+        return el.text
+    div = el.find(f"{_XHTML}div")
+    if div is None:
+        return el.text
+    # Detach from the feed so its default Atom namespace is not inherited
+    div = etree.fromstring(etree.tostring(div))
+    for node in div.iter(etree.Element):
+        node.tag = etree.QName(node).localname
+    etree.cleanup_namespaces(div)
+    parts = [div.text or ""]
+    parts.extend(
+        etree.tostring(child, encoding="unicode", with_tail=True) for child in div
+    )
+    return "".join(parts).strip()
+
+
+def _parse_with_lxml(
+    body: bytes, cutoff_ts: int
+) -> tuple[str | None, int, list[dict[str, Any]]]:
+    """
+    Extract only the fields the pipeline uses from an RSS 2.0 or Atom feed.
+
+    Matches ``_recent_entries`` on those fields for RSS 2.0 and Atom,
+    including permalink <guid>s and type="xhtml" summaries.  Other formats
+    (RSS 1.0/RDF, JSON Feed) are not handled: they are logged and yield no
+    entries, so leave USE_LXML_PARSER off for feed lists that use them.
+    """
+    from lxml import etree
+
+    # Parsers are not safe to share between worker threads
+    parser = etree.XMLParser(recover=True, resolve_entities=False, no_network=True)
+    root = etree.fromstring(body, parser=parser)
+    if root is None:
+        return None, 0, []
+
+    if root.tag == f"{_ATOM}feed":
+        source = root.findtext(f"{_ATOM}title")
+        items = root.findall(f"{_ATOM}entry")
+        fields = [
+            (
+                it.findtext(f"{_ATOM}title"),
+                _atom_link(it),
+                it.findtext(f"{_ATOM}published") or it.findtext(f"{_ATOM}updated"),
+                _atom_text(it, "summary") or _atom_text(it, "content"),
+            )
+            for it in items
+        ]
+    else:
+        channel = root.find("channel") if root.tag == "rss" else None
+        if channel is None:
+            logger.warning(
+                "lxml parser: unsupported feed root <%s>, no entries read",
+                etree.QName(root).localname,
+            )
+            return None, 0, []
+        source = channel.findtext("title")
+        items = channel.findall("item")
+        fields = [
+            (
+                it.findtext("title"),
+                _rss_link(it),
+                it.findtext("pubDate") or it.findtext(_DC_DATE),
+                it.findtext("description") or it.findtext(_CONTENT_ENCODED),
+            )
+            for it in items
+        ]
+
+    entries: list[dict[str, Any]] = []
+    for title, link, published, summary in fields:
+        ts = _parse_date(published)
+        if ts is None or ts < cutoff_ts:
+            continue
+        title = (title or "").strip()
+        if not title:
+            continue
+        entries.append(
+            {
+                "title": title,
+                "link": (link or "").strip(),
+                "published": (published or "").strip(),
+                "summary": summary or "",
+                "ts": ts,
+            }
+        )
+    return (source or "").strip() or None, len(items), entries
+
+
+def _parse_feed(
+    body: bytes, headers: dict[str, str], cutoff_ts: int
+) -> tuple[str | None, int, list[dict[str, Any]]]:
+    """
+    Parse a downloaded feed body (runs in a worker thread).
+
+    Returns (feed title or None, total entry count, recent entries).
+    """
+    if USE_LXML_PARSER:
+        return _parse_with_lxml(body, cutoff_ts)
+
+    # feedparser drags in sgmllib, chardet and friends; import it on the
+    # first parse rather than at cold start.
+    import feedparser
+
+    parsed = feedparser.parse(
+        body,
+        response_headers=headers,
+        sanitize_html=False,
+        resolve_relative_uris=False,
+    )
+    entries = _recent_entries(parsed, cutoff_ts)
+    return parsed.feed.get("title"), len(parsed.entries), entries
+
+
+async def _fetch_feed(
+    session: aiohttp.ClientSession,
+    sem: asyncio.Semaphore,
+    url: str,
+    cached: dict[str, Any] | None,
+    cutoff_ts: int,
+) -> dict[str, Any] | None:
+    """
+    Conditionally download one feed.
+
+    Returns {"etag", "last_modified", "source", "entries"}: the cached copy
+    on a 304, a freshly parsed one on a 200, or None if the feed failed.
+    """
+    # Exceptions are logged below; skip the SDK's per-span exception event.
+    with tracer.start_as_current_span("fetch_feed", record_exception=False) as feed_span:
+        # Skip attribute work entirely when the sampler dropped this span
+        recording = feed_span.is_recording()
+        if recording:
+            feed_span.set_attribute("feed.url", url)
+        request_headers: dict[str, str] = {}
+        if cached:
+            if cached.get("etag"):
+                request_headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                request_headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            async with sem, session.get(url, headers=request_headers) as resp:
+                if resp.status == 304 and cached:
+                    if recording:
+                        feed_span.set_attribute("feed.not_modified", True)
+                        feed_span.set_attribute("feed.source", cached["source"])
+                        feed_span.set_attribute("feed.entries", len(cached["entries"]))
+                    return cached
+                resp.raise_for_status()
+                body = await resp.read()
+                # feedparser reads the charset from the HTTP headers
+                headers = {k.lower(): v for k, v in resp.headers.items()}
+            headers.setdefault("content-location", url)
+            # Parsing is CPU-bound; run it off the loop so other feeds'
+            # sockets keep being serviced meanwhile.  Summaries only go to
+            # the LLM (and are escaped if rendered), so skip sanitising
+            # and resolving URIs inside their markup.
+            title, n_entries, entries = await asyncio.to_thread(
+                _parse_feed, body, headers, cutoff_ts
+            )
+            source = title or url
+            if recording:
+                feed_span.set_attribute("feed.source", source)
+                feed_span.set_attribute("feed.entries", n_entries)
+            return {
+                "etag": headers.get("etag"),
+                "last_modified": headers.get("last-modified"),
+                "source": source,
+                "entries": entries,
+            }
+        except Exception:
+            if recording:
+                feed_span.set_attribute("feed.error", True)
+            logger.exception("Failed to fetch feed: %s", url)
+            return None
+
+
+# Last fetch result keyed by feed list, so triggers fired in quick
+# succession (retries, manual runs) skip the network entirely.
+_RESULT_CACHE: TTLCache[tuple[str, ...], Stories] | None = (
+    TTLCache(maxsize=1, ttl=FETCH_RESULT_TTL_SECONDS)
+    if FETCH_RESULT_TTL_SECONDS > 0
+    else None
+)
+
+
+def new_session() -> aiohttp.ClientSession:
+    """
+    Return a session configured for feed downloads; the caller closes it.
+
+    Connections are capped in total and per host (several feeds share a
+    host), and DNS answers are cached so repeat hosts skip the lookup.
+    Must be called with an event loop running.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=FEED_MAX_CONCURRENCY, limit_per_host=2, ttl_dns_cache=300
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=15),
+        headers={"User-Agent": _USER_AGENT},
+    )
+
+
+async def fetch_all_async(
+    feeds: list[str] | None = None,
+    session: aiohttp.ClientSession | None = None,
+) -> Stories:
+    """
+    Fetch and merge entries from all RSS feeds concurrently.
+
+    Feeds are requested with If-None-Match / If-Modified-Since from the
+    previous run; unchanged feeds (304) reuse their cached entries without
+    re-parsing.  Pass a long-lived ``session`` (see ``new_session``) to
+    reuse its pooled connections and DNS cache across runs; otherwise a
+    session is opened for this call only.
+
+    A complete, non-empty result less than FETCH_RESULT_TTL_SECONDS old for
+    the same feed list is returned as-is, so callers must not modify it.
+
+    Returns a ``Stories`` table with one row per unique headline; its
+    ``feed_counts`` column drives the classifier's macro threshold.
     """
     feeds = feeds or DEFAULT_FEEDS
-    seen: set[str] = set()
-    stories: list[dict[str, Any]] = []
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=24)
+    key = tuple(feeds)
 
     with tracer.start_as_current_span("fetch_all") as span:
         span.set_attribute("feeds.count", len(feeds))
 
-        for url in feeds:
-            with tracer.start_as_current_span("fetch_feed") as feed_span:
-                feed_span.set_attribute("feed.url", url)
-                try:
-                    parsed = feedparser.parse(url)
-                    source = parsed.feed.get("title", url)
-                    feed_span.set_attribute("feed.source", source)
-                    feed_span.set_attribute("feed.entries", len(parsed.entries))
-                    for entry in parsed.entries:
-                        if not _is_recent(entry, cutoff):
-                            continue
-                        title = entry.get("title", "").strip()
-                        if not title:
-                            continue
-                        fp = _fingerprint(title)
-                        if fp in seen:
-                            for s in stories:
-                                if s["fingerprint"] == fp:
-                                    s["feed_count"] += 1
-                                    break
-                            continue
-                        seen.add(fp)
-
-                        published = entry.get("published", entry.get("updated", ""))
-                        stories.append(
-                            {
-                                "title": title,
-                                "link": entry.get("link", ""),
-                                "source": source,
-                                "published": published,
-                                "fingerprint": fp,
-                                "summary": entry.get("summary", ""),
-                                "feed_count": 1,
-                            }
-                        )
-                except Exception:
-                    feed_span.set_attribute("feed.error", True)
-                    logger.exception("Failed to fetch feed: %s", url)
+        recent = _RESULT_CACHE.get(key) if _RESULT_CACHE is not None else None
+        span.set_attribute("feeds.result_cached", recent is not None)
+        if recent is not None:
+            logger.info(
+                "Reusing %d stories fetched in the last %ds",
+                len(recent),
+                FETCH_RESULT_TTL_SECONDS,
+            )
+            return recent
+
+        stories = Stories()
+        cutoff_ts = int((datetime.now(timezone.utc) - timedelta(hours=24)).timestamp())
+        feed_cache = _load_feed_cache()
+
+        # Cap in-flight requests so queued feeds wait here, not on the pool
+        sem = asyncio.Semaphore(FEED_MAX_CONCURRENCY)
+        owned = session is None
+        if owned:
+            session = new_session()
+        try:
+            results = await asyncio.gather(
+                *(
+                    _fetch_feed(session, sem, url, feed_cache.get(url), cutoff_ts)
+                    for url in feeds
+                )
+            )
+        finally:
+            if owned:
+                await session.close()
+
+        # Merge in feed order so dedup and feed_category stay deterministic
+        for url, result in zip(feeds, results):
+            if result is None:
+                continue
+            feed_cache[url] = result
+            for entry in result["entries"]:
+                # Cached entries may have aged past the cutoff since last run
+                if entry["ts"] < cutoff_ts:
+                    continue
+                stories.add(
+                    _fingerprint(entry["title"]),
+                    entry["title"],
+                    entry["link"],
+                    result["source"],
+                    entry["published"],
+                    entry["summary"],
+                    FEED_SECTIONS.get(url),
+                )
 
         span.set_attribute("feeds.stories_total", len(stories))
 
+    _save_feed_cache({url: feed_cache[url] for url in feeds if url in feed_cache})
+    # Only a complete fetch is reused; after any feed failure a retry
+    # should go back to the network.
+    complete = all(result is not None for result in results)
+    if _RESULT_CACHE is not None and stories and complete:
+        _RESULT_CACHE[key] = stories
     logger.info("Fetched %d unique stories from %d feeds", len(stories), len(feeds))
     return stories
+
+
+def fetch_all(
+    feeds: list[str] | None = None,
+) -> Stories:
+    """Blocking wrapper around ``fetch_all_async`` for synchronous callers."""
+    return asyncio.run(fetch_all_async(feeds))
@@ -0,0 +1,111 @@
+"""
+OpenAI Batch API helper.
+
+Submits a set of chat-completion requests as one batch job, polls until
+it finishes, and returns the parsed response bodies keyed by custom_id.
+Batch jobs are billed at half the synchronous rate and draw from a
+separate rate-limit pool, at the cost of minutes (not seconds) of latency.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any
+
+import orjson
+
+from app.config import BATCH_MAX_WAIT_SECONDS, BATCH_POLL_SECONDS
+from app.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+tracer = get_tracer(__name__)
+
+_ENDPOINT = "/v1/chat/completions"
+_TERMINAL_FAILURES = ("failed", "expired", "cancelled")
+
+
+def _cancel(client: Any, batch_id: str) -> None:
+    try:
+        client.batches.cancel(batch_id)
+        logger.warning("Cancelled batch %s", batch_id)
+    except Exception:
+        logger.exception("Failed to cancel batch %s", batch_id)
+
+
+def run_batch(client: Any, bodies: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """
+    Run ``{custom_id: request_body}`` through the Batch API.
+
+    Returns ``{custom_id: chat_completion_body}`` for every request that
+    succeeded.  Raises ``RuntimeError`` if the batch fails or does not
+    finish within BATCH_MAX_WAIT_SECONDS; an unfinished batch is cancelled
+    before the error propagates.
+    """
+    jsonl = b"\n".join(
+        orjson.dumps(
+            {"custom_id": cid, "method": "POST", "url": _ENDPOINT, "body": body}
+        )
+        for cid, body in bodies.items()
+    )
+
+    with tracer.start_as_current_span("openai_batch") as span:
+        span.set_attribute("batch.requests", len(bodies))
+
+        upload = client.files.create(
+            file=("batch.jsonl", jsonl), purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=upload.id,
+            endpoint=_ENDPOINT,
+            completion_window="24h",
+        )
+        span.set_attribute("batch.id", batch.id)
+        logger.info("Submitted batch %s with %d request(s)", batch.id, len(bodies))
+
+        deadline = time.monotonic() + BATCH_MAX_WAIT_SECONDS
+        try:
+            while batch.status != "completed":
+                if batch.status in _TERMINAL_FAILURES:
+                    raise RuntimeError(
+                        f"Batch {batch.id} ended with status {batch.status}"
+                    )
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(
+                        f"Batch {batch.id} not done after {BATCH_MAX_WAIT_SECONDS}s"
+                    )
+                time.sleep(min(BATCH_POLL_SECONDS, remaining))
+                batch = client.batches.retrieve(batch.id)
+        except BaseException:
+            # Whatever stopped the wait (deadline, poll error, shutdown),
+            # nobody will collect the results: don't leave the job running.
+            if batch.status not in _TERMINAL_FAILURES:
+                _cancel(client, batch.id)
+            raise
+
+        span.set_attribute("batch.status", batch.status)
+        if batch.error_file_id:
+            logger.warning(
+                "Batch %s reported per-request errors (file %s)",
+                batch.id,
+                batch.error_file_id,
+            )
+
+        out: dict[str, dict[str, Any]] = {}
+        if not batch.output_file_id:
+            return out
+        for line in client.files.content(batch.output_file_id).content.splitlines():
+            if not line.strip():
+                continue
+            row = orjson.loads(line)
+            response = row.get("response") or {}
+            if row.get("error") or response.get("status_code") != 200:
+                logger.warning(
+                    "Batch request %s failed: %s", row.get("custom_id"), row.get("error")
+                )
+                continue
+            out[row["custom_id"]] = response["body"]
+
+        span.set_attribute("batch.succeeded", len(out))
+        return out
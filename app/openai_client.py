@@ -0,0 +1,56 @@
+"""
+Shared OpenAI clients.
+
+Every module talks to OpenAI through one process-wide client so TLS
+handshakes and keep-alive connections are reused across the classifier,
+the Batch API helper and the digest writer.  ``openai`` and ``httpx`` are
+imported on first use to keep them off the cold-start path.
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import TYPE_CHECKING
+
+from app.config import OPENAI_API_KEY
+
+if TYPE_CHECKING:
+    import httpx
+    import openai
+
+
+def _limits() -> httpx.Limits:
+    import httpx
+
+    return httpx.Limits(max_keepalive_connections=20, max_connections=40)
+
+
+@functools.cache
+def get_client() -> openai.OpenAI | None:
+    """Return the shared synchronous client, or None without an API key."""
+    if not OPENAI_API_KEY:
+        return None
+    import httpx
+    import openai
+
+    return openai.OpenAI(
+        api_key=OPENAI_API_KEY,
+        http_client=httpx.Client(limits=_limits(), http2=True),
+    )
+
+
+def new_async_client() -> openai.AsyncOpenAI:
+    """
+    Return a new async client with the same pool settings.
+
+    Async connections are bound to the event loop that opened them, so
+    callers own the client for one loop and close it (``async with``).
+    HTTP/2 multiplexes concurrent requests over a single connection.
+    """
+    import httpx
+    import openai
+
+    return openai.AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        http_client=httpx.AsyncClient(limits=_limits(), http2=True),
+    )
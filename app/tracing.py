@@ -5,7 +5,6 @@ Initialises the OTel SDK with:
 - Cloud Trace exporter (auto-detected on Cloud Run)
 - Console exporter fallback for local development
 - FastAPI auto-instrumentation
-- requests library auto-instrumentation
 
 Usage:
     Call ``init_tracing(app)`` once at startup from main.py.
@@ -14,12 +13,12 @@ Usage:
 
 from __future__ import annotations
 
+import functools
 import logging
 import os
 
 from opentelemetry import trace
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
-from opentelemetry.instrumentation.requests import RequestsInstrumentor
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
@@ -68,16 +67,19 @@ def init_tracing(app) -> None:  # noqa: ANN001 (FastAPI type avoided for import
 
     trace.set_tracer_provider(provider)
 
-    # Auto-instrument FastAPI (inbound HTTP)
+    # Auto-instrument FastAPI (inbound HTTP).  Must run before the app
+    # starts serving, since it installs middleware.
     FastAPIInstrumentor.instrument_app(app)
 
-    # Auto-instrument requests (outbound HTTP, e.g. feedparser uses urllib
-    # but Gmail API client uses requests under the hood)
-    RequestsInstrumentor().instrument()
-
     logger.info("OpenTelemetry tracing initialised for '%s'", _SERVICE_NAME)
 
 
+@functools.lru_cache(maxsize=None)
 def get_tracer(name: str) -> trace.Tracer:
-    """Return a tracer scoped to the given module name."""
+    """
+    Return a tracer scoped to the given module name.
+
+    Memoised: tracers obtained before ``init_tracing`` are proxies that
+    pick up the real provider once it is set, so caching them is safe.
+    """
     return trace.get_tracer(name)
@@ -0,0 +1,99 @@
+"""Classifier caching and keyword scanning."""
+
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import orjson
+
+from app import classifier
+from app.news_fetcher import Stories, _fingerprint
+
+
+class _StubEmbeddings:
+    """One orthogonal unit vector per distinct title."""
+
+    def __init__(self):
+        self._dims = {}
+
+    def create(self, model, input):
+        data = []
+        for text in input:
+            dim = self._dims.setdefault(text.split("\n", 1)[0], len(self._dims))
+            vec = [0.0] * 8
+            vec[dim] = 1.0
+            data.append(SimpleNamespace(embedding=vec))
+        return SimpleNamespace(data=data)
+
+
+class _StubAsyncClient:
+    """Relevant unless the title says "rationed"; echoes ids back."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def create(self, messages, **kwargs):
+        items = orjson.loads(messages[-1]["content"])
+        results = [
+            {
+                "id": item["id"],
+                "relevant": "rationed" not in item["t"],
+                "rationed": "rationed" in item["t"],
+                "section": "ai_tech",
+                "reason": "stub",
+            }
+            for item in items
+        ]
+        message = SimpleNamespace(content=orjson.dumps({"results": results}).decode())
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=message)])
+
+
+def test_rationed_verdicts_are_not_cached(monkeypatch, tmp_path):
+    db = tmp_path / "cache.sqlite3"
+    client = SimpleNamespace(embeddings=_StubEmbeddings())
+    monkeypatch.setattr(classifier, "get_client", lambda: client)
+    monkeypatch.setattr(classifier, "new_async_client", _StubAsyncClient)
+    monkeypatch.setattr(classifier, "SEMANTIC_CACHE_PATH", str(db))
+    monkeypatch.setattr(classifier, "USE_BATCH_API", False)
+
+    stories = Stories()
+    for title in ("kept story", "rationed story"):
+        stories.add(_fingerprint(title), title, "", "src", "", "", None)
+
+    verdicts = classifier._llm_classify(stories, [0, 1])
+
+    assert verdicts[0]["relevant"] and not verdicts[0]["rationed"]
+    assert verdicts[1]["rationed"]
+    with sqlite3.connect(db) as conn:
+        cached = {fp for (fp,) in conn.execute("SELECT fingerprint FROM classifications")}
+    assert cached == {f"{stories.fingerprints[0]:016x}"}
+
+
+def test_detect_special_situations_across_threads():
+    # Switch threads as often as possible so scans (and the Python match
+    # callbacks inside them) overlap; a shared scratch fails here.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    summary = " ".join(["takeover merger split IPO"] * 200)
+    texts = [
+        (f"Board backs takeover {i}", summary) if i % 2 else (f"Quiet day {i}", "")
+        for i in range(2000)
+    ]
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(
+                pool.map(lambda t: classifier._detect_special_situations(*t), texts)
+            )
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert results == [
+        ["takeover", "split", "merger", "IPO"] if i % 2 else [] for i in range(2000)
+    ]
@@ -0,0 +1,20 @@
+"""Plain-text conversion of raw feed summaries."""
+
+from app.feed_text import lede, plain_text
+
+
+def test_plain_text_drops_markup_and_decodes_entities():
+    markup = (
+        '<p><img src="x.jpg" alt="a b c d"/> Fed <b>held</b> rates &amp; '
+        "signalled&nbsp;cuts</p><script>track()</script><style>p{}</style>"
+    )
+    assert plain_text(markup) == "Fed held rates & signalled cuts"
+
+
+def test_lede_counts_words_not_markup():
+    markup = '<p><a href="https://example.com/a b c">one</a> two three four</p>'
+    assert lede(markup, 3) == "one two three"
+
+
+def test_plain_text_passes_plain_input_through():
+    assert plain_text("  already   plain text ") == "already plain text"
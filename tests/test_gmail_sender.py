@@ -0,0 +1,47 @@
+"""Round-trip checks for the hand-assembled digest message."""
+
+import email
+import email.policy
+
+from app import gmail_sender
+
+
+def _build(monkeypatch, subject: str, html: str) -> tuple[bytes, str]:
+    monkeypatch.setattr(gmail_sender, "GMAIL_SENDER", "brief@example.com")
+    monkeypatch.setattr(
+        gmail_sender, "GMAIL_RECIPIENTS", ["a@example.com", "b@example.com"]
+    )
+    return gmail_sender._build_message(subject, html)
+
+
+def test_message_round_trips(monkeypatch):
+    subject = "Morning Brief // Thursday, October 15, 2026"
+    html = "<p>Café &amp; markets</p>\n" * 50
+    raw, message_id = _build(monkeypatch, subject, html)
+
+    msg = email.message_from_bytes(raw, policy=email.policy.default)
+    assert msg["Subject"] == subject
+    assert msg["From"] == "brief@example.com"
+    assert msg["To"] == "a@example.com, b@example.com"
+    assert msg["Message-ID"] == message_id
+    assert msg.get_content_type() == "multipart/alternative"
+
+    plain, rich = msg.get_payload()
+    assert plain.get_content_type() == "text/plain"
+    assert rich.get_content_type() == "text/html"
+    assert rich.get_content() == html
+
+
+def test_long_non_ascii_subject_is_folded_with_crlf(monkeypatch):
+    subject = "Résumé du matin // " + "économie " * 20
+    raw, _ = _build(monkeypatch, subject, "<p>x</p>")
+
+    # Every line ending, folded headers included, must be CRLF
+    assert b"\n" not in raw.replace(b"\r\n", b"")
+    assert b"\r" not in raw.replace(b"\r\n", b"")
+
+    headers = raw.split(b"\r\n\r\n", 1)[0]
+    assert b"\r\n " in headers  # the subject really was folded
+
+    msg = email.message_from_bytes(raw, policy=email.policy.default)
+    assert msg["Subject"] == subject
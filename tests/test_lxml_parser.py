@@ -0,0 +1,46 @@
+"""The USE_LXML_PARSER path against feedparser on the same fixtures."""
+
+import calendar
+import logging
+from pathlib import Path
+
+import pytest
+
+from app import news_fetcher
+
+_FIXTURES = Path(__file__).parent / "fixtures"
+_CUTOFF = calendar.timegm((2026, 10, 1, 0, 0, 0))
+
+
+def _parse(name, monkeypatch, use_lxml):
+    monkeypatch.setattr(news_fetcher, "USE_LXML_PARSER", use_lxml)
+    body = (_FIXTURES / name).read_bytes()
+    return news_fetcher._parse_feed(body, {}, _CUTOFF)
+
+
+@pytest.mark.parametrize("name", ["rss2.xml", "atom.xml"])
+def test_matches_feedparser(name, monkeypatch):
+    expected = _parse(name, monkeypatch, use_lxml=False)
+    assert expected[2], "fixture should have recent entries"
+    assert _parse(name, monkeypatch, use_lxml=True) == expected
+
+
+def test_permalink_guid_is_the_link(monkeypatch):
+    _, _, entries = _parse("rss2.xml", monkeypatch, use_lxml=True)
+    links = {e["title"]: e["link"] for e in entries}
+    assert links["Permalink guid only"] == "https://example.com/permalink"
+    assert links["Default guid only"] == "https://example.com/default-guid"
+    assert links["Opaque guid"] == ""
+
+
+def test_xhtml_summary_is_kept(monkeypatch):
+    _, _, entries = _parse("atom.xml", monkeypatch, use_lxml=True)
+    summaries = {e["title"]: e["summary"] for e in entries}
+    assert summaries["XHTML summary"] == "<p>Inline <b>xhtml</b> body</p> and a tail"
+    assert summaries["XHTML content only"] == "<p>Content body</p>"
+
+
+def test_rdf_is_logged_not_silent(monkeypatch, caplog):
+    with caplog.at_level(logging.WARNING, logger=news_fetcher.__name__):
+        assert _parse("rdf.xml", monkeypatch, use_lxml=True) == (None, 0, [])
+    assert "RDF" in caplog.text
@@ -0,0 +1,57 @@
+"""fetch_all_async against a local feed server."""
+
+import asyncio
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from aiohttp import web
+from cachetools import TTLCache
+
+from app import news_fetcher
+
+
+def _rss(title):
+    published = format_datetime(datetime.now(timezone.utc), usegmt=True)
+    return (
+        '<?xml version="1.0"?><rss version="2.0"><channel><title>Feed</title>'
+        f"<item><title>{title}</title><link>https://example.com/{title}</link>"
+        f"<pubDate>{published}</pubDate></item></channel></rss>"
+    )
+
+
+async def _serve(handler, runs):
+    """Serve ``handler`` on a local port and fetch both feeds ``runs`` times."""
+    app = web.Application()
+    app.router.add_get("/{name}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    feeds = [f"http://127.0.0.1:{port}/good", f"http://127.0.0.1:{port}/flaky"]
+    try:
+        return [await news_fetcher.fetch_all_async(feeds) for _ in range(runs)]
+    finally:
+        await runner.cleanup()
+
+
+def test_failed_feed_is_refetched_on_next_call(monkeypatch):
+    monkeypatch.setattr(news_fetcher, "FEED_CACHE_PATH", "")
+    monkeypatch.setattr(news_fetcher, "_RESULT_CACHE", TTLCache(maxsize=1, ttl=300))
+    hits = {"good": 0, "flaky": 0}
+
+    async def handler(request):
+        name = request.match_info["name"]
+        hits[name] += 1
+        if name == "flaky" and hits[name] == 1:
+            raise web.HTTPInternalServerError()
+        return web.Response(text=_rss(name), content_type="application/rss+xml")
+
+    first, second, third = asyncio.run(_serve(handler, runs=3))
+
+    # The partial first result was not cached, so the retry hit the network
+    assert first.titles == ["good"]
+    assert second.titles == ["good", "flaky"]
+    assert hits == {"good": 2, "flaky": 2}
+    # ...and the complete second result is what gets reused
+    assert third is second
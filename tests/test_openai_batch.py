@@ -0,0 +1,57 @@
+"""run_batch cancels jobs it stops waiting for."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app import openai_batch
+
+
+class _StubBatches:
+    def __init__(self, statuses):
+        self._statuses = iter(statuses)
+        self.cancelled = []
+
+    def create(self, **kwargs):
+        return self.retrieve("batch-1")
+
+    def retrieve(self, batch_id):
+        status = next(self._statuses)
+        if isinstance(status, BaseException):
+            raise status
+        return SimpleNamespace(id=batch_id, status=status)
+
+    def cancel(self, batch_id):
+        self.cancelled.append(batch_id)
+
+
+def _client(statuses):
+    files = SimpleNamespace(create=lambda **kwargs: SimpleNamespace(id="file-1"))
+    return SimpleNamespace(files=files, batches=_StubBatches(statuses))
+
+
+@pytest.fixture(autouse=True)
+def _no_sleep(monkeypatch):
+    monkeypatch.setattr(openai_batch.time, "sleep", lambda seconds: None)
+
+
+def test_cancels_after_max_wait(monkeypatch):
+    monkeypatch.setattr(openai_batch, "BATCH_MAX_WAIT_SECONDS", 0)
+    client = _client(["in_progress"])
+    with pytest.raises(RuntimeError, match="not done"):
+        openai_batch.run_batch(client, {"a": {}})
+    assert client.batches.cancelled == ["batch-1"]
+
+
+def test_cancels_when_polling_fails():
+    client = _client(["validating", ConnectionError("poll failed")])
+    with pytest.raises(ConnectionError):
+        openai_batch.run_batch(client, {"a": {}})
+    assert client.batches.cancelled == ["batch-1"]
+
+
+def test_failed_batch_is_not_cancelled():
+    client = _client(["validating", "failed"])
+    with pytest.raises(RuntimeError, match="failed"):
+        openai_batch.run_batch(client, {"a": {}})
+    assert client.batches.cancelled == []
@@ -0,0 +1,69 @@
+"""SemanticCache persistence across runs."""
+
+import sqlite3
+
+import numpy as np
+
+from app.classifier import SemanticCache
+
+_VERDICT = {"relevant": True, "section": "ai_tech", "reason": "r"}
+
+
+def _open(path, model):
+    return SemanticCache(str(path), model, threshold=0.9, ttl_hours=72)
+
+
+def _vectors(n, dim):
+    rng = np.random.default_rng(dim)
+    return rng.normal(size=(n, dim)).astype(np.float32)
+
+
+def test_hit_on_reopen(tmp_path):
+    db = tmp_path / "cache.sqlite3"
+    vecs = _vectors(2, 8)
+    cache = _open(db, "model-a")
+    cache.store([1, 2], vecs, [_VERDICT, _VERDICT])
+    cache.close()
+
+    cache = _open(db, "model-a")
+    assert cache.lookup(vecs) == [_VERDICT, _VERDICT]
+    cache.close()
+
+
+def test_changing_model_drops_old_rows(tmp_path):
+    db = tmp_path / "cache.sqlite3"
+    cache = _open(db, "model-a")
+    cache.store([1], _vectors(1, 8), [_VERDICT])
+    cache.close()
+
+    # New model with a different dimension: a miss, then new rows stored
+    new_vecs = _vectors(1, 16)
+    cache = _open(db, "model-b")
+    assert cache.lookup(new_vecs) == [None]
+    cache.store([2], new_vecs, [_VERDICT])
+    cache.close()
+
+    # Reopening must not mix 8- and 16-dim rows
+    cache = _open(db, "model-b")
+    assert cache.lookup(new_vecs) == [_VERDICT]
+    cache.close()
+
+
+def test_table_without_model_column_is_rebuilt(tmp_path):
+    db = tmp_path / "cache.sqlite3"
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "CREATE TABLE classifications (fingerprint TEXT PRIMARY KEY, "
+        "embedding BLOB NOT NULL, relevant INTEGER NOT NULL, "
+        "section TEXT NOT NULL, reason TEXT NOT NULL, ts REAL NOT NULL)"
+    )
+    conn.execute(
+        "INSERT INTO classifications VALUES ('x', ?, 1, 'ai_tech', '', 9e9)",
+        (_vectors(1, 4)[0].astype(np.float16).tobytes(),),
+    )
+    conn.commit()
+    conn.close()
+
+    cache = _open(db, "model-a")
+    assert cache.lookup(_vectors(1, 8)) == [None]
+    cache.close()